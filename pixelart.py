@@ -1,83 +1,180 @@
-from PIL import Image, ImageDraw
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from PIL import Image
 import math
+import multiprocessing
+import os
 import numpy as np
-from sklearn.cluster import KMeans
 
-def get_average_color(image, dominant_coefficient=0.5, color_threshold=10):
+try:
+    from numba import njit, prange, set_num_threads
+except ImportError:  # Numba необов'язкова: без неї використовується повільніший шлях
+    njit = None
+
+def get_average_color(image, dominant_coefficient=0.5, color_threshold=10, background_color=None):
     """
     Обчислює середній колір зображення, ігноруючи фон та підсилюючи домінуючий колір.
     
     Args:
-        image: Зображення для обробки
+        image: Зображення або масив пікселів для обробки
         dominant_coefficient (float): Коефіцієнт підсилення домінуючого кольору (0-1)
         color_threshold (int): Поріг відмінності кольорів для об'єднання (0-255)
+        background_color (tuple): Колір фону, який потрібно ігнорувати (None - не ігнорувати)
     """
-    pixels = list(image.getdata())
-    background_color = pixels[0]  # Колір фону з лівого верхнього кута
+    # Масив спільно використовує буфер зображення замість кортежу на кожен піксель
+    pixels = np.asarray(image, dtype=np.uint8)
+    pixels = pixels.reshape(-1, pixels.shape[2] if pixels.ndim == 3 else 1)
     
     # Фільтруємо пікселі, ігноруючи фон
-    filtered_pixels = [p for p in pixels if p != background_color]
-    
-    if not filtered_pixels:  # Якщо всі пікселі - фон
-        return background_color
-    
-    # Групуємо схожі кольори
-    color_groups = []
-    for pixel in filtered_pixels:
-        found_group = False
-        for group in color_groups:
-            # Перевіряємо чи колір належить до групи
-            if all(abs(p - g) <= color_threshold for p, g in zip(pixel, group[0])):
-                group.append(pixel)
-                found_group = True
-                break
-        if not found_group:
-            color_groups.append([pixel])
+    if background_color is None:
+        filtered_pixels = pixels
+    else:
+        filtered_pixels = pixels[np.any(pixels != np.asarray(background_color, dtype=np.uint8), axis=1)]
     
-    # Знаходимо найбільшу групу кольорів
-    largest_group = max(color_groups, key=len)
+    if not len(filtered_pixels):  # Якщо всі пікселі - фон
+        return tuple(background_color)
+    
+    # Середній колір усіх пікселів без фону; суми накопичуються в uint32 без переходу до float64
+    avg_color = filtered_pixels.sum(axis=0, dtype=np.uint32) / len(filtered_pixels)
     
-    # Обчислюємо середній колір з найбільшої групи
-    r, g, b = 0, 0, 0
-    count = len(largest_group)
+    # Без підсилення домінуючий колір не потрібен
+    if dominant_coefficient == 0:
+        return tuple(avg_color.astype(np.uint8).tolist())
     
-    for pr, pg, pb in largest_group:
-        r += pr
-        g += pg
-        b += pb
+    # Групуємо схожі кольори, квантуючи кожен канал з кроком color_threshold
+    bins = filtered_pixels.astype(np.uint32) // max(color_threshold, 1)
+    shifts = 8 * np.arange(bins.shape[1] - 1, -1, -1, dtype=np.uint32)
+    keys = np.bitwise_or.reduce(bins << shifts, axis=1)
     
-    avg_color = (r // count, g // count, b // count)
+    # Знаходимо найбільшу групу кольорів
+    group_keys, counts = np.unique(keys, return_counts=True)
+    largest_group = filtered_pixels[keys == group_keys[np.argmax(counts)]]
     
     # Знаходимо домінуючий колір (середній колір найбільшої групи)
-    dominant_color = avg_color
+    dominant_color = largest_group.sum(axis=0, dtype=np.uint32) / len(largest_group)
     
-    # Змішуємо середній колір з домінуючим згідно коефіцієнта
-    mixed_color = tuple(
-        int(avg * (1 - dominant_coefficient) + dom * dominant_coefficient)
-        for avg, dom in zip(avg_color, dominant_color)
-    )
+    # Змішуємо середній колір з домінуючим згідно коефіцієнта одною векторною операцією
+    mixed_color = avg_color * (1 - dominant_coefficient) + dominant_color * dominant_coefficient
     
-    return mixed_color
+    return tuple(mixed_color.astype(np.uint8).tolist())
 
-def create_circle_mask(size):
-    """Створює маску для кола заданого розміру."""
-    mask = Image.new('L', (size, size), 0)
-    draw = ImageDraw.Draw(mask)
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def tile_dominant_colors(arr, tile_height, tile_width, color_threshold, dominant_coefficient, background_color):
+        """
+        Обчислює колір кожної плитки так само, як get_average_color, паралельно по рядках плиток.
+        
+        Args:
+            arr: Масив зображення форми (H, W, 3) типу uint8
+            tile_height (int): Висота плитки
+            tile_width (int): Ширина плитки
+            color_threshold (int): Поріг відмінності кольорів для об'єднання (0-255)
+            dominant_coefficient (float): Коефіцієнт підсилення домінуючого кольору (0-1)
+            background_color: Масив з трьох int64 - колір фону, який потрібно ігнорувати
+                (значення поза 0-255, наприклад -1, вимикають фільтр)
+            
+        Returns:
+            np.ndarray: Масив кольорів форми (рядки, стовпці, 3)
+        """
+        bg_r, bg_g, bg_b = background_color[0], background_color[1], background_color[2]
+        num_rows = arr.shape[0] // tile_height
+        num_cols = arr.shape[1] // tile_width
+        step = max(color_threshold, 1)
+        colors = np.empty((num_rows, num_cols, 3), dtype=np.uint8)
+        
+        for i in prange(num_rows):
+            keys = np.empty(tile_height * tile_width, dtype=np.int64)
+            for j in range(num_cols):
+                top = i * tile_height
+                left = j * tile_width
+                
+                # Перший прохід: сума кольорів без фону та ключі груп
+                count = 0
+                sum_r, sum_g, sum_b = 0, 0, 0
+                for y in range(top, top + tile_height):
+                    for x in range(left, left + tile_width):
+                        r, g, b = np.int64(arr[y, x, 0]), np.int64(arr[y, x, 1]), np.int64(arr[y, x, 2])
+                        if r == bg_r and g == bg_g and b == bg_b:
+                            continue
+                        keys[count] = ((r // step) << 16) | ((g // step) << 8) | (b // step)
+                        sum_r += r
+                        sum_g += g
+                        sum_b += b
+                        count += 1
+                
+                if count == 0:  # Якщо всі пікселі - фон
+                    colors[i, j, 0], colors[i, j, 1], colors[i, j, 2] = bg_r, bg_g, bg_b
+                    continue
+                
+                # Без підсилення домінуючий колір не потрібен
+                if dominant_coefficient == 0:
+                    colors[i, j, 0] = int(sum_r / count)
+                    colors[i, j, 1] = int(sum_g / count)
+                    colors[i, j, 2] = int(sum_b / count)
+                    continue
+                
+                # Знаходимо найбільшу групу серед відсортованих ключів
+                sorted_keys = np.sort(keys[:count])
+                best_key, best_count = sorted_keys[0], 0
+                run_start = 0
+                for k in range(1, count + 1):
+                    if k == count or sorted_keys[k] != sorted_keys[run_start]:
+                        if k - run_start > best_count:
+                            best_key, best_count = sorted_keys[run_start], k - run_start
+                        run_start = k
+                
+                # Другий прохід: сума кольорів найбільшої групи
+                dom_r, dom_g, dom_b = 0, 0, 0
+                for y in range(top, top + tile_height):
+                    for x in range(left, left + tile_width):
+                        r, g, b = np.int64(arr[y, x, 0]), np.int64(arr[y, x, 1]), np.int64(arr[y, x, 2])
+                        if r == bg_r and g == bg_g and b == bg_b:
+                            continue
+                        if ((r // step) << 16) | ((g // step) << 8) | (b // step) == best_key:
+                            dom_r += r
+                            dom_g += g
+                            dom_b += b
+                
+                # Змішуємо середній колір з домінуючим згідно коефіцієнта
+                colors[i, j, 0] = int(sum_r / count * (1 - dominant_coefficient) + dom_r / best_count * dominant_coefficient)
+                colors[i, j, 1] = int(sum_g / count * (1 - dominant_coefficient) + dom_g / best_count * dominant_coefficient)
+                colors[i, j, 2] = int(sum_b / count * (1 - dominant_coefficient) + dom_b / best_count * dominant_coefficient)
+        
+        return colors
+else:
+    tile_dominant_colors = None
+
+@lru_cache(maxsize=32)
+def create_circle_mask(size, antialias=False):
+    """
+    Створює маску для кола заданого розміру.
     
+    Маска кешується, тому повертається лише для читання.
+    
+    Args:
+        size (int): Діаметр кола
+        antialias (bool): Повернути згладжену маску прозорості замість булевої
+        
+    Returns:
+        np.ndarray: Булева маска або маска прозорості (0-1) форми (size, size)
+    """
     # Радіус кола - половина розміру
-    radius = size // 2
-    # Координати центру
-    center = (size // 2, size // 2)
-    
-    # Малюємо коло
-    draw.ellipse(
-        (center[0] - radius, center[1] - radius,
-         center[0] + radius, center[1] + radius),
-        fill=255
-    )
+    radius = size / 2
+    # Відстань від центру кола до центру кожного пікселя
+    yy, xx = np.ogrid[:size, :size]
+    distance = np.hypot(xx + 0.5 - radius, yy + 0.5 - radius)
+    
+    if antialias:
+        # Частка пікселя всередині кола, лінійно на межі шириною в один піксель;
+        # межа зсунута на півпікселя всередину, щоб згладжений край не виходив за квадрат size x size
+        mask = np.clip(radius - distance, 0, 1).astype(np.float32)
+    else:
+        mask = distance <= radius
+    mask.setflags(write=False)
     return mask
 
-def sample_colors(image, pixel_in_row, dominant_coefficient=0.5, color_threshold=10):
+def sample_colors(image, pixel_in_row, dominant_coefficient=0.5, color_threshold=10, use_dominant=False,
+                  rows_per_strip=32, background_color=None):
     """
     Зчитує кольори з зображення та зберігає їх у масиві.
     
@@ -86,121 +183,177 @@ def sample_colors(image, pixel_in_row, dominant_coefficient=0.5, color_threshold
         pixel_in_row (int): Кількість пікселів у рядку
         dominant_coefficient (float): Коефіцієнт підсилення домінуючого кольору (0-1)
         color_threshold (int): Поріг відмінності кольорів для об'єднання (0-255)
+        use_dominant (bool): Використовувати домінуючий колір замість простого середнього
+        rows_per_strip (int): Кількість рядів плиток, що обробляються за раз
+        background_color (tuple): Колір фону, який ігнорується при use_dominant (None - не ігнорувати)
         
     Returns:
-        list: Двовимірний масив кольорів
+        np.ndarray: Масив кольорів форми (рядки, стовпці, 3) типу uint8
     """
     width, height = image.size
-    input_pixel_size = width // pixel_in_row
+    input_pixel_size = max(1, width // pixel_in_row)
+    # Висота плитки для шестикутної сітки
+    tile_height = max(1, int(input_pixel_size * 0.866))
     
-    # Розрахунок кількості зразків
-    samples_per_row = width // input_pixel_size
-    num_rows = height // int(input_pixel_size * 0.866)
+    # Розрахунок кількості зразків: рівно pixel_in_row у рядку, кількість рядів - за пропорціями
+    samples_per_row = pixel_in_row
+    num_rows = max(1, round(height * samples_per_row * input_pixel_size / width / tile_height))
+    
+    # Обидва шляхи масштабують дані RGB: для режимів "P" і "1" PIL ігнорує фільтр і бере NEAREST
+    rgb = image if image.mode == 'RGB' else image.convert('RGB')
+    
+    if not use_dominant:
+        # Просте середнє: BOX-фільтр усереднює кожну плитку за один виклик по всьому зображенню
+        return np.asarray(rgb.resize((samples_per_row, num_rows), Image.Resampling.BOX))
+    
+    # Зображення масштабується до цілої кількості плиток, щоб не відкидати крайні пікселі;
+    # масштаб по вертикалі переводить координати смуги в координати вхідного зображення
+    grid_width, grid_height = samples_per_row * input_pixel_size, num_rows * tile_height
+    scale_y = height / grid_height
+    
+    # Колір фону для ядра Numba; -1 не збігається з жодним каналом і вимикає фільтр
+    kernel_background = np.array(background_color if background_color is not None else (-1, -1, -1), dtype=np.int64)
     
     # Ініціалізація масиву кольорів
-    colors = []
-    
-    for i in range(num_rows):
-        row_colors = []
-        for j in range(samples_per_row):
-            # Координати для зчитування кольору
-            left = j * input_pixel_size
-            upper = i * int(input_pixel_size * 0.866)
-            right = left + input_pixel_size
-            lower = upper + int(input_pixel_size * 0.866)
-            
-            box = (left, upper, right, lower)
-            region = image.crop(box)
-            color = get_average_color(region, dominant_coefficient, color_threshold)
-            row_colors.append(color)
+    colors = np.empty((num_rows, samples_per_row, 3), dtype=np.uint8)
+    
+    # Обробляємо зображення смугами по rows_per_strip рядів плиток,
+    # щоб у пам'яті був масив лише однієї смуги, а не всього зображення
+    for strip_top in range(0, num_rows, rows_per_strip):
+        strip_rows = min(rows_per_strip, num_rows - strip_top)
+        strip_top_px, strip_height = strip_top * tile_height, strip_rows * tile_height
+        if rgb.size == (grid_width, grid_height):
+            strip = rgb.crop((0, strip_top_px, grid_width, strip_top_px + strip_height))
+        else:
+            # Масштабуємо лише смугу, а не все зображення
+            strip_box = (0, strip_top_px * scale_y, width, (strip_top_px + strip_height) * scale_y)
+            strip = rgb.resize((grid_width, strip_height), Image.Resampling.LANCZOS, box=strip_box)
+        arr = np.asarray(strip)
+        
+        if tile_dominant_colors is not None:
+            # Домінуючий колір: скомпільоване ядро Numba для всіх плиток смуги
+            colors[strip_top:strip_top + strip_rows] = tile_dominant_colors(
+                arr, tile_height, input_pixel_size, color_threshold, dominant_coefficient, kernel_background)
+            continue
         
-        colors.append(row_colors)
+        # Плитки беремо як зрізи масиву, без окремого зображення на кожну
+        for i in range(strip_rows):
+            for j in range(samples_per_row):
+                # Координати для зчитування кольору
+                left = j * input_pixel_size
+                upper = i * tile_height
+                right = left + input_pixel_size
+                lower = upper + tile_height
+                
+                region = arr[upper:lower, left:right]
+                colors[strip_top + i, j] = get_average_color(region, dominant_coefficient, color_threshold,
+                                                             background_color)
     
     return colors
 
-def reduce_colors(colors, num_colors):
+def reduce_colors(colors, num_colors, method=Image.Quantize.MEDIANCUT):
     """
     Зменшує кількість унікальних кольорів у масиві, об'єднуючи схожі кольори.
     
     Args:
-        colors (list): Двовимірний масив кольорів
+        colors (np.ndarray): Масив кольорів форми (рядки, стовпці, 3)
         num_colors (int): Бажана кількість унікальних кольорів
+        method: Метод квантування PIL (Image.Quantize.MEDIANCUT, FASTOCTREE, LIBIMAGEQUANT)
+            або "kmeans" для кластеризації k-means (потребує scikit-learn)
         
     Returns:
-        list: Масив кольорів зі зменшеною кількістю унікальних кольорів
+        np.ndarray: Масив кольорів зі зменшеною кількістю унікальних кольорів
     """
-    # Збираємо всі унікальні кольори
-    unique_colors = set()
-    for row in colors:
-        unique_colors.update(row)
+    # Рахуємо унікальні кольори за одним ключем uint32 на колір, без сортування рядків масиву
+    flat_colors = colors.reshape(-1, 3).astype(np.uint32)
+    keys = (flat_colors[:, 0] << 16) | (flat_colors[:, 1] << 8) | flat_colors[:, 2]
     
     # Якщо кількість унікальних кольорів менша за бажану, повертаємо оригінал
-    if len(unique_colors) <= num_colors:
+    if len(np.unique(keys)) <= num_colors:
         return colors
     
-    # Перетворюємо кольори в масив для кластеризації
-    color_array = np.array(list(unique_colors))
+    if method != "kmeans":
+        # Квантування PIL виконується в C і не потребує scikit-learn
+        quantized = Image.fromarray(colors).quantize(colors=num_colors, method=method)
+        return np.asarray(quantized.convert('RGB'))
     
-    # Виконуємо k-means кластеризацію
-    kmeans = KMeans(n_clusters=num_colors, random_state=42)
-    kmeans.fit(color_array)
+    # Збираємо всі унікальні кольори та індекс кожного кольору серед них
+    unique_colors, inverse = np.unique(colors.reshape(-1, 3), axis=0, return_inverse=True)
     
-    # Створюємо словник для заміни кольорів
-    color_map = {tuple(color): tuple(kmeans.cluster_centers_[kmeans.predict([color])[0]].astype(int))
-                for color in unique_colors}
+    # Виконуємо k-means кластеризацію одразу для всіх кольорів
+    from sklearn.cluster import MiniBatchKMeans
+    kmeans = MiniBatchKMeans(n_clusters=num_colors, random_state=42, n_init=3)
+    labels = kmeans.fit_predict(unique_colors)
+    centers = kmeans.cluster_centers_.round().astype(np.uint8)
     
-    # Застосовуємо заміну кольорів
-    reduced_colors = []
-    for row in colors:
-        reduced_row = [color_map[tuple(color)] for color in row]
-        reduced_colors.append(reduced_row)
+    # Застосовуємо заміну кольорів одним індексуванням замість словника
+    reduced_colors = centers[labels][inverse.ravel()]
     
-    return reduced_colors
+    return reduced_colors.reshape(colors.shape)
 
-def generate_circle_image(colors, output_path):
+def generate_circle_image(colors, output_path, antialias=False, verbose=True, compress_level=1):
     """
     Генерує зображення з кіл на основі масиву кольорів.
     
     Args:
-        colors (list): Двовимірний масив кольорів
+        colors (np.ndarray): Масив кольорів форми (рядки, стовпці, 3)
         output_path (str): Шлях для збереження вихідного зображення
+        antialias (bool): Згладжувати краї кіл
+        verbose (bool): Виводити повідомлення про хід роботи
+        compress_level (int): Рівень стиснення PNG (0-9): 1 - швидко для чернеток, 6 і вище - для архіву
     """
     # Фіксовані розміри сітки
     grid_horizontal = 46  # Відстань між центрами по горизонталі
     grid_vertical = 40    # Відстань між рядами
     circle_radius = 22    # Радіус кола
     
+    colors = np.asarray(colors, dtype=np.uint8)
+    num_rows, num_cols = colors.shape[:2]
+    
     # Розрахунок розмірів вихідного зображення
-    output_width = len(colors[0]) * grid_horizontal + grid_horizontal // 2
-    output_height = len(colors) * grid_vertical + grid_vertical
-    output_img = Image.new('RGB', (output_width, output_height), (255, 255, 255))
+    output_width = num_cols * grid_horizontal + grid_horizontal // 2
+    output_height = num_rows * grid_vertical + grid_vertical
+    output = np.full((output_height, output_width, 3), 255, dtype=np.uint8)
     
-    # Створюємо маску кола
-    circle_mask = create_circle_mask(circle_radius * 2)
+    # Створюємо маску кола та повторюємо її з кроком сітки на весь ряд
+    circle_mask = create_circle_mask(circle_radius * 2, antialias)
+    cell_mask = np.zeros((circle_radius * 2, grid_horizontal), dtype=circle_mask.dtype)
+    cell_mask[:, :circle_radius * 2] = circle_mask
+    row_mask = np.tile(cell_mask, (1, num_cols))[..., None]
+    row_width = num_cols * grid_horizontal
+    
+    # Координати верхнього лівого кута кожного ряду кіл, із зсувом для чергування рядів
+    rows = np.arange(num_rows)
+    row_tops = (rows * grid_vertical).tolist()
+    row_lefts = np.where(rows % 2, grid_horizontal // 2, 0).tolist()
     
     # Генеруємо зображення
-    for y in range(len(colors)):
-        for x in range(len(colors[y])):
-            # Зсув для чергування рядів
-            x_offset = grid_horizontal // 2 if y % 2 != 0 else 0
-            
-            # Координати центру кола
-            center_x = x * grid_horizontal + x_offset + circle_radius
-            center_y = y * grid_vertical + circle_radius
-            
-            # Координати для вставки кола (з урахуванням радіуса)
-            paste_x = center_x - circle_radius
-            paste_y = center_y - circle_radius
-            
-            # Створюємо тимчасове зображення з кольором
-            temp_img = Image.new('RGB', (circle_radius * 2, circle_radius * 2), colors[y][x])
-            # Застосовуємо маску кола
-            output_img.paste(temp_img, (paste_x, paste_y), circle_mask)
+    for row_color, top, left in zip(colors, row_tops, row_lefts):
+        # Розгортаємо кольори ряду до повної ширини і вставляємо всі кола ряду за маскою
+        row_colors = np.repeat(row_color, grid_horizontal, axis=0)
+        region = output[top:top + circle_radius * 2, left:left + row_width]
+        if antialias:
+            region[:] = (region * (1 - row_mask) + row_colors[None] * row_mask).round().astype(np.uint8)
+        else:
+            np.copyto(region, row_colors[None], where=row_mask)
+    
+    # Швидке збереження: низький рівень стиснення PNG, найшвидший метод WebP
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == '.png':
+        save_options = {'compress_level': compress_level, 'optimize': False}
+    elif extension == '.webp':
+        save_options = {'method': 0, 'quality': 80}
+    else:
+        save_options = {}
     
-    output_img.save(output_path)
-    print(f"Successfully saved circular pixelated image to {output_path}")
+    output_img = Image.fromarray(output)
+    output_img.save(output_path, **save_options)
+    if verbose:
+        print(f"Successfully saved circular pixelated image to {output_path}")
 
-def pixelate_image(input_path, output_path, pixel_in_row, dominant_coefficient=0.5, color_threshold=10, num_colors=None):
+def pixelate_image(input_path, output_path, pixel_in_row, dominant_coefficient=0.5, color_threshold=10, num_colors=None,
+                   use_dominant=False, antialias=False, verbose=True, background_color=None,
+                   reduce_method=Image.Quantize.MEDIANCUT, compress_level=1):
     """
     Перетворює зображення на піксель-арт у формі кіл з фіксованою сіткою.
 
@@ -211,35 +364,87 @@ def pixelate_image(input_path, output_path, pixel_in_row, dominant_coefficient=0
         dominant_coefficient (float): Коефіцієнт підсилення домінуючого кольору (0-1)
         color_threshold (int): Поріг відмінності кольорів для об'єднання (0-255)
         num_colors (int): Кількість унікальних кольорів у вихідному зображенні
+        use_dominant (bool): Використовувати домінуючий колір замість простого середнього
+        antialias (bool): Згладжувати краї кіл
+        verbose (bool): Виводити повідомлення про хід роботи
+        background_color (tuple): Колір фону, який ігнорується при use_dominant (None - не ігнорувати)
+        reduce_method: Метод зменшення кількості кольорів (див. reduce_colors)
+        compress_level (int): Рівень стиснення PNG (0-9)
+        
+    Returns:
+        bool: True, якщо зображення успішно збережено
     """
     try:
         # Відкриваємо зображення
         img = Image.open(input_path)
         
         # Зчитуємо кольори
-        print("Sampling colors from image...")
-        colors = sample_colors(img, pixel_in_row, dominant_coefficient, color_threshold)
+        if verbose:
+            print("Sampling colors from image...")
+        colors = sample_colors(img, pixel_in_row, dominant_coefficient, color_threshold, use_dominant,
+                               background_color=background_color)
         
         # Зменшуємо кількість кольорів, якщо вказано
         if num_colors is not None:
-            print(f"Reducing colors to {num_colors} unique colors...")
-            colors = reduce_colors(colors, num_colors)
+            if verbose:
+                print(f"Reducing colors to {num_colors} unique colors...")
+            colors = reduce_colors(colors, num_colors, reduce_method)
         
         # Генеруємо вихідне зображення
-        print("Generating output image...")
-        generate_circle_image(colors, output_path)
+        if verbose:
+            print("Generating output image...")
+        generate_circle_image(colors, output_path, antialias, verbose, compress_level)
+        return True
         
     except FileNotFoundError:
         print(f"Error: Input file {input_path} not found")
     except Exception as e:
         print(f"Error processing image: {str(e)}")
+    return False
+
+def _init_worker():
+    """Обмежує Numba одним потоком у процесі, щоб процеси не конкурували за ядра."""
+    if njit is not None:
+        set_num_threads(1)
 
-# Використання
-input_path = "sol.jpg"  # Замініть на шлях до вашого зображення
-output_path = 'pxcapybara.png'  # Замініть на шлях для збереження вихідного зображення
-pixel_in_row = 50  # Кількість пікселів у рядку
-dominant_coefficient = 0.9  # Коефіцієнт підсилення домінуючого кольору
-color_threshold = 100  # Поріг відмінності кольорів для об'єднання
-num_colors = 12  # Кількість унікальних кольорів у вихідному зображенні
+def pixelate_many(pairs, pixel_in_row, max_workers=None, **kwargs):
+    """
+    Перетворює кілька зображень паралельно, по одному процесу на файл.
+
+    Args:
+        pairs (list): Пари (шлях до вхідного зображення, шлях до вихідного зображення)
+        pixel_in_row (int): Кількість пікселів у рядку.
+        max_workers (int): Кількість процесів (за замовчуванням - кількість ядер)
+        **kwargs: Інші параметри pixelate_image (verbose за замовчуванням вимкнено)
+        
+    Returns:
+        list: Результат pixelate_image (True - успіх, False - помилка) для кожної пари в тому ж порядку
+    """
+    if not pairs:
+        return []
+    
+    kwargs.setdefault('verbose', False)
+    input_paths, output_paths = zip(*pairs)
+    worker = partial(pixelate_image, pixel_in_row=pixel_in_row, **kwargs)
+    # spawn замість fork: після запуску ядра Numba пул потоків у батьківському процесі
+    # не переживає fork, і інтерпретатор зависає при виході
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_worker,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(worker, input_paths, output_paths))
+
+def main():
+    # Використання
+    input_path = "sol.jpg"  # Замініть на шлях до вашого зображення
+    output_path = 'pxcapybara.png'  # Замініть на шлях для збереження вихідного зображення
+    pixel_in_row = 50  # Кількість пікселів у рядку
+    dominant_coefficient = 0.9  # Коефіцієнт підсилення домінуючого кольору
+    color_threshold = 100  # Поріг відмінності кольорів для об'єднання
+    num_colors = 12  # Кількість унікальних кольорів у вихідному зображенні
+    use_dominant = True  # Використовувати домінуючий колір замість простого середнього
+    background_color = None  # Колір фону, який ігнорується (None - не ігнорувати)
+    
+    pixelate_image(input_path, output_path, pixel_in_row, dominant_coefficient, color_threshold, num_colors, use_dominant,
+                   background_color=background_color)
 
-pixelate_image(input_path, output_path, pixel_in_row, dominant_coefficient, color_threshold, num_colors)
\ No newline at end of file
+if __name__ == "__main__":
+    main()